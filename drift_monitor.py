@@ -0,0 +1,199 @@
+import numpy as np
+from scipy.stats import chi2
+
+from feature_schema import FLAG_FEATURES
+
+MONITORED_CATEGORIES = ['OP_UNIQUE_CARRIER', 'ORIGIN', 'DEST']
+
+PSI_THRESHOLD = 0.2
+ZERO_FILL_THRESHOLD = 0.25
+UNSEEN_RATE_THRESHOLD = 0.05
+MAX_UNSEEN_TRACKED = 50
+DEFAULT_CHECK_EVERY = 100
+MIN_CHECK_ROWS = 100
+DRIFT_P_VALUE = 1e-3
+MIN_EXPECTED_COUNT = 5
+MAX_DISCRETE_VALUES = 32
+
+SCORE_EDGES = np.linspace(0, 1, 11)[1:-1]
+
+def _histogram(values, edges):
+    return np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+
+def _psi(expected, actual, eps=1e-4):
+    expected = np.clip(expected, eps, None)
+    actual = np.clip(actual / max(actual.sum(), 1), eps, None)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def _is_shifted(psi, p_value, alpha):
+    return psi > PSI_THRESHOLD and p_value < alpha
+
+def _shift(expected, actual, eps=1e-4):
+    # Bins expected to hold fewer than MIN_EXPECTED_COUNT rows are pooled, so empty
+    # bins in a small window neither inflate PSI nor break the chi-square test.
+    # A shift needs both a large PSI and a significant test.
+    n = actual.sum()
+    expected_counts = expected * n
+    sparse = expected_counts < MIN_EXPECTED_COUNT
+    if sparse.any():
+        expected = np.append(expected[~sparse], expected[sparse].sum())
+        actual = np.append(actual[~sparse], actual[sparse].sum())
+        expected_counts = expected * n
+    if len(actual) < 2:
+        return 0.0, 1.0
+    
+    statistic = np.sum((actual - expected_counts) ** 2 / np.clip(expected_counts, eps, None))
+    return _psi(expected, actual, eps), float(chi2.sf(statistic, len(actual) - 1))
+
+def _edges(col, values, bins):
+    # Flags and small integer features get one bin per value; quantile edges would
+    # collapse them into a single bin that can never shift
+    if col in FLAG_FEATURES:
+        return np.array([1.0])
+    distinct = np.unique(values)
+    if len(distinct) <= MAX_DISCRETE_VALUES:
+        return distinct[1:]
+    return np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)))[1:-1]
+
+def build_reference_profile(X, scores=None, categories=None, bins=10):
+    profile = {'features': {}, 'categories': {}, 'scores': None}
+    
+    for col in X.columns:
+        values = X[col].to_numpy(dtype=np.float64)
+        edges = _edges(col, values, bins)
+        profile['features'][col] = {
+            'edges': edges,
+            'proportions': _histogram(values, edges) / len(values),
+            'zero_rate': float(np.mean(values == 0))
+        }
+    
+    for col, known in (categories or {}).items():
+        profile['categories'][col] = set(str(value) for value in known)
+    
+    if scores is not None:
+        scores = np.asarray(scores, dtype=np.float64)
+        profile['scores'] = _histogram(scores, SCORE_EDGES) / len(scores)
+    
+    return profile
+
+def new_monitor(profile, check_every=DEFAULT_CHECK_EVERY):
+    if check_every < MIN_CHECK_ROWS:
+        raise ValueError(f"check_every must be at least {MIN_CHECK_ROWS}, got {check_every}")
+    monitor = {'profile': profile, 'check_every': check_every, 'n': 0, 'alerts': []}
+    _reset_window(monitor)
+    return monitor
+
+def _reset_window(monitor):
+    profile = monitor['profile']
+    monitor['window'] = 0
+    monitor['features'] = {
+        col: {'counts': np.zeros(len(ref['edges']) + 1, dtype=np.int64), 'zeros': 0}
+        for col, ref in profile['features'].items()
+    }
+    monitor['categories'] = {col: {'unseen': 0, 'values': {}} for col in profile['categories']}
+    monitor['scores'] = np.zeros(len(SCORE_EDGES) + 1, dtype=np.int64)
+
+def _accumulate(monitor, X, scores, categories):
+    profile = monitor['profile']
+    
+    for col, state in monitor['features'].items():
+        values = X[col].to_numpy(dtype=np.float64) if col in X.columns else np.zeros(len(X))
+        state['counts'] += _histogram(values, profile['features'][col]['edges'])
+        state['zeros'] += int(np.sum(values == 0))
+    
+    for col, state in monitor['categories'].items():
+        if col not in categories:
+            continue
+        known = profile['categories'][col]
+        for value in categories[col]:
+            value = str(value)
+            if value in known:
+                continue
+            state['unseen'] += 1
+            if value in state['values'] or len(state['values']) < MAX_UNSEEN_TRACKED:
+                state['values'][value] = state['values'].get(value, 0) + 1
+    
+    if scores is not None:
+        monitor['scores'] += _histogram(scores, SCORE_EDGES)
+    
+    monitor['window'] += len(X)
+    monitor['n'] += len(X)
+
+def update_monitor(monitor, X, scores=None, categories=None):
+    # Counters cover one window of check_every requests; each check compares that
+    # window with the reference and then starts a fresh one, so memory stays constant
+    # and new drift is not averaged away by earlier traffic.
+    if scores is not None:
+        scores = np.atleast_1d(scores).astype(np.float64)
+    categories = {col: np.atleast_1d(values) for col, values in (categories or {}).items()}
+    
+    alerts = []
+    start = 0
+    while start < len(X):
+        stop = min(len(X), start + monitor['check_every'] - monitor['window'])
+        _accumulate(
+            monitor,
+            X.iloc[start:stop],
+            scores[start:stop] if scores is not None else None,
+            {col: values[start:stop] for col, values in categories.items()}
+        )
+        start = stop
+        
+        if monitor['window'] >= monitor['check_every']:
+            alerts = check_drift(monitor)
+            monitor['alerts'] = alerts
+            _reset_window(monitor)
+    
+    return alerts
+
+def pop_alerts(monitor):
+    alerts = monitor['alerts']
+    monitor['alerts'] = []
+    return alerts
+
+def check_drift(monitor):
+    profile = monitor['profile']
+    n = monitor['window']
+    alerts = []
+    # Smaller windows are too noisy to judge, e.g. the partial window left at exit
+    if n < MIN_CHECK_ROWS:
+        return alerts
+    
+    # DRIFT_P_VALUE bounds the chance of any false shift alert per window
+    alpha = DRIFT_P_VALUE / (len(monitor['features']) + 1)
+    
+    for col, state in monitor['features'].items():
+        reference = profile['features'][col]
+        
+        psi, p_value = _shift(reference['proportions'], state['counts'])
+        if _is_shifted(psi, p_value, alpha):
+            alerts.append({'check': 'distribution_shift', 'feature': col, 'value': psi})
+        
+        zero_rate = state['zeros'] / n
+        if zero_rate - reference['zero_rate'] > ZERO_FILL_THRESHOLD:
+            alerts.append({'check': 'zero_fill', 'feature': col, 'value': zero_rate})
+    
+    for col, state in monitor['categories'].items():
+        unseen_rate = state['unseen'] / n
+        if unseen_rate > UNSEEN_RATE_THRESHOLD:
+            alerts.append({
+                'check': 'unseen_category',
+                'feature': col,
+                'value': unseen_rate,
+                'examples': sorted(state['values'], key=state['values'].get, reverse=True)[:5]
+            })
+    
+    if profile['scores'] is not None and monitor['scores'].sum() >= MIN_CHECK_ROWS:
+        psi, p_value = _shift(profile['scores'], monitor['scores'])
+        if _is_shifted(psi, p_value, alpha):
+            alerts.append({'check': 'score_shift', 'feature': 'prediction', 'value': psi})
+    
+    return alerts
+
+def format_alert(alert):
+    if alert['check'] == 'unseen_category':
+        return (f"{alert['feature']}: {alert['value']*100:.1f}% of requests use values not seen "
+                f"in training (e.g. {', '.join(alert['examples'])})")
+    if alert['check'] == 'zero_fill':
+        return f"{alert['feature']}: zero-filled in {alert['value']*100:.1f}% of requests"
+    return f"{alert['feature']}: distribution shift (PSI {alert['value']:.2f})"
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+FLAG_FEATURES = [
+    'ORIGIN_EXTREME_WEATHER', 'DEST_EXTREME_WEATHER',
+    'IS_HOLIDAY', 'HOLIDAY_TRAVEL_PERIOD', 'IS_WEEKEND',
+    'FL_DATE_is_weekend', 'FL_DATE_is_holiday_season', 'FL_DATE_is_summer_travel',
+    'FL_DATE_is_spring_break',
+    'IS_MORNING_RUSH', 'IS_EVENING_RUSH', 'IS_REDEYE', 'IS_MIDDAY', 'SAME_STATE'
+]
+
+SMALL_INT_FEATURES = [
+    'MONTH', 'FLIGHTS', 'DISTANCE_GROUP',
+    'ORIGIN_WEATHER_SEVERITY', 'DEST_WEATHER_SEVERITY', 'MAX_WEATHER_SEVERITY',
+    'DAY_OF_WEEK', 'WEEK_OF_YEAR',
+    'FL_DATE_month', 'FL_DATE_day', 'FL_DATE_dayofweek', 'FL_DATE_quarter',
+    'DEP_HOUR', 'TIME_CATEGORY'
+]
+
+INTEGER_FEATURES = [
+    'YEAR', 'OP_CARRIER_FL_NUM', 'ORIGIN_AIRPORT_ID', 'DEST_AIRPORT_ID', 'DEP_TIME',
+    'ORIGIN_ALTITUDE', 'DEST_ALTITUDE', 'ORIGIN_CLUSTER_ID', 'DEST_CLUSTER_ID'
+]
+
+WIDE_INTEGER_FEATURES = ['DEST_AIRPORT_SEQ_ID']
+
+CATEGORICAL_FEATURES = [
+    'OP_UNIQUE_CARRIER', 'OP_CARRIER', 'SOURCE_FILE', 'SEASON', 'HOLIDAY_NAME',
+    'ORIGIN', 'ORIGIN_CITY_NAME', 'ORIGIN_STATE_ABR', 'ORIGIN_STATE_NM',
+    'ORIGIN_AIRPORT_NAME', 'ORIGIN_CITY', 'ORIGIN_COUNTRY', 'ORIGIN_TIMEZONE',
+    'ORIGIN_TZ_DATABASE', 'ORIGIN_CONDITIONS', 'ORIGIN_WEATHER_ICON',
+    'DEST', 'DEST_CITY_NAME', 'DEST_STATE_ABR', 'DEST_STATE_NM',
+    'DEST_AIRPORT_NAME', 'DEST_CITY', 'DEST_COUNTRY', 'DEST_TIMEZONE',
+    'DEST_TZ_DATABASE', 'DEST_CONDITIONS', 'DEST_WEATHER_ICON'
+]
+
+CONTINUOUS_FEATURES = [
+    'DISTANCE', 'WEATHER_IMPACT_SCORE', 'SEVERITY_DISTANCE_EFFECT',
+    'ORIGIN_LATITUDE_x', 'ORIGIN_LONGITUDE_x', 'DEST_LATITUDE_x', 'DEST_LONGITUDE_x',
+    'ORIGIN_CLUSTER_LAT', 'ORIGIN_CLUSTER_LON', 'DEST_CLUSTER_LAT', 'DEST_CLUSTER_LON',
+    'ORIGIN_LATITUDE_y', 'ORIGIN_LONGITUDE_y', 'DEST_LATITUDE_y', 'DEST_LONGITUDE_y',
+    'ORIGIN_TEMP_MAX', 'ORIGIN_TEMP_MIN', 'ORIGIN_TEMP_AVG',
+    'ORIGIN_PRECIPITATION', 'ORIGIN_PRECIPITATION_PROBABILITY',
+    'ORIGIN_SNOW', 'ORIGIN_SNOW_DEPTH', 'ORIGIN_WIND_SPEED', 'ORIGIN_WIND_DIRECTION',
+    'ORIGIN_HUMIDITY', 'ORIGIN_PRESSURE', 'ORIGIN_CLOUD_COVER', 'ORIGIN_VISIBILITY',
+    'DEST_TEMP_MAX', 'DEST_TEMP_MIN', 'DEST_TEMP_AVG',
+    'DEST_PRECIPITATION', 'DEST_PRECIPITATION_PROBABILITY',
+    'DEST_SNOW', 'DEST_SNOW_DEPTH', 'DEST_WIND_SPEED', 'DEST_WIND_DIRECTION',
+    'DEST_HUMIDITY', 'DEST_PRESSURE', 'DEST_CLOUD_COVER', 'DEST_VISIBILITY',
+    'FL_DATE_month_sin', 'FL_DATE_month_cos', 'FL_DATE_day_sin', 'FL_DATE_day_cos',
+    'DEP_HOUR_SIN', 'DEP_HOUR_COS'
+]
+
+FEATURE_DTYPES = {
+    **{col: np.int8 for col in FLAG_FEATURES},
+    **{col: np.int8 for col in SMALL_INT_FEATURES},
+    **{col: np.int16 for col in INTEGER_FEATURES},
+    **{col: np.int32 for col in WIDE_INTEGER_FEATURES},
+    **{col: np.int16 for col in CATEGORICAL_FEATURES},
+    **{col: np.float32 for col in CONTINUOUS_FEATURES}
+}
+
+PIPELINE_DTYPES = {
+    **{col: np.int8 for col in [
+        'DEP_DEL15', 'ARR_DEL15', 'CANCELLED', 'DIVERTED', 'IS_DELAYED',
+        'DEP_DELAY_GROUP', 'ARR_DELAY_GROUP', 'BINARY_DELAY_CLASS',
+        'DEP_DELAY_MISSING', 'ARR_DELAY_MISSING', 'DELAY_CAUSE_REPORTED',
+        'DEP_DELAY_NEW_MISSING', 'DEP_DEL15_MISSING', 'DEP_DELAY_GROUP_MISSING',
+        'ARR_DELAY_NEW_MISSING', 'ARR_DEL15_MISSING', 'ARR_DELAY_GROUP_MISSING',
+        'AIR_TIME_MISSING', 'HAS_CARRIER_DELAY', 'HAS_WEATHER_DELAY',
+        'HAS_NAS_DELAY', 'HAS_SECURITY_DELAY', 'HAS_LATE_AIRCRAFT_DELAY',
+        'CARRIER_DELAY_SEVERITY', 'WEATHER_DELAY_SEVERITY', 'NAS_DELAY_SEVERITY',
+        'SECURITY_DELAY_SEVERITY', 'LATE_AIRCRAFT_DELAY_SEVERITY'
+    ]},
+    **{col: np.int16 for col in ['ARR_TIME', 'AIR_TIME']},
+    **{col: np.float32 for col in [
+        'DEP_DELAY', 'DEP_DELAY_NEW', 'ARR_DELAY', 'ARR_DELAY_NEW',
+        'CARRIER_DELAY', 'WEATHER_DELAY', 'NAS_DELAY', 'SECURITY_DELAY',
+        'LATE_AIRCRAFT_DELAY'
+    ]},
+    **{col: np.bool_ for col in [
+        'CANCEL_REASON_A', 'CANCEL_REASON_B', 'CANCEL_REASON_C',
+        'CANCEL_REASON_D', 'CANCEL_REASON_N'
+    ]}
+}
+
+DTYPE_SCHEMA = {**PIPELINE_DTYPES, **FEATURE_DTYPES}
+
+MEMORY_REPORT = {}
+
+def cast_checked(series, dtype):
+    if np.issubdtype(dtype, np.integer) and len(series):
+        info = np.iinfo(dtype)
+        c_min, c_max = series.min(), series.max()
+        if c_min < info.min or c_max > info.max:
+            raise ValueError(
+                f"Column {series.name} has values in [{c_min}, {c_max}], outside the "
+                f"{np.dtype(dtype).name} range [{info.min}, {info.max}]"
+            )
+    return series.astype(dtype)
+
+def with_float_dtype(float_dtype, schema=DTYPE_SCHEMA):
+    return {col: float_dtype if col in CONTINUOUS_FEATURES else dtype for col, dtype in schema.items()}
+
+def enforce_schema(df, schema=DTYPE_SCHEMA):
+    # Strings, categoricals and datetimes are left for the encoding stage; integer
+    # columns that still hold NaN are kept as float32 until they are filled.
+    for col, dtype in schema.items():
+        if col not in df.columns or not pd.api.types.is_numeric_dtype(df[col].dtype):
+            continue
+        if df[col].dtype == dtype:
+            continue
+        if np.issubdtype(dtype, np.integer) and df[col].isna().any():
+            df[col] = df[col].astype(np.float32)
+        else:
+            df[col] = cast_checked(df[col], dtype)
+    return df
+
+def read_csv_with_schema(path, **kwargs):
+    parse_dtypes = {col: np.float32 for col, dtype in DTYPE_SCHEMA.items()
+                    if col not in CATEGORICAL_FEATURES and dtype != np.bool_}
+    return enforce_schema(pd.read_csv(path, dtype=parse_dtypes, **kwargs))
+
+def report_memory(df, stage):
+    bytes_per_row = df.memory_usage(deep=True).sum() / max(len(df), 1)
+    MEMORY_REPORT[stage] = bytes_per_row
+    print(f"[{stage}] {bytes_per_row:,.1f} bytes/row ({len(df):,} rows x {df.shape[1]} columns)")
+    return bytes_per_row
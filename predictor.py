@@ -9,6 +9,29 @@ import xgboost as xgb
 from sklearn.preprocessing import RobustScaler
 import argparse
 import sys
+import weakref
+from collections import OrderedDict
+from feature_schema import enforce_schema, with_float_dtype
+from drift_monitor import MONITORED_CATEGORIES, DEFAULT_CHECK_EVERY, MIN_CHECK_ROWS, new_monitor, update_monitor, pop_alerts, check_drift, format_alert
+
+EXPLANATION_GROUPS = ['carrier', 'route', 'weather', 'time']
+
+EXPLANATION_LABELS = {
+    'carrier': 'Airline',
+    'route': 'Route and airports',
+    'weather': 'Weather',
+    'time': 'Departure date and time'
+}
+
+WEATHER_KEYWORDS = ('WEATHER', 'TEMP', 'PRECIPITATION', 'SNOW', 'WIND', 'HUMIDITY',
+                    'PRESSURE', 'CLOUD', 'VISIBILITY', 'CONDITIONS', 'SEVERITY')
+TIME_KEYWORDS = ('YEAR', 'MONTH', 'FL_DATE', 'DEP_TIME', 'DEP_HOUR', 'DAY_OF_WEEK',
+                 'WEEKEND', 'WEEK_OF_YEAR', 'SEASON', 'HOLIDAY', 'RUSH', 'REDEYE',
+                 'MIDDAY', 'TIME_CATEGORY', 'SOURCE_FILE')
+ROUTE_KEYWORDS = ('ORIGIN', 'DEST', 'DISTANCE', 'SAME_STATE', 'FLIGHTS')
+
+EXPLANATION_CACHE_SIZE = 10000
+_explanation_caches = weakref.WeakKeyDictionary()
 
 def load_model():
     try:
@@ -33,6 +56,18 @@ def load_model():
         print(f"Error loading model: {str(e)}")
         sys.exit(1)
 
+def feature_dtype(model):
+    # Boosters trained before the dtype schema carry no tag and were fit on float64 inputs
+    return np.dtype(model.attr('feature_dtype') or np.float64)
+
+def load_reference_profile():
+    if not os.path.exists('flight_delay_xgboost_reference_profile.pkl'):
+        print("Reference profile 'flight_delay_xgboost_reference_profile.pkl' not found. Drift monitoring disabled.\n")
+        return None
+    
+    with open('flight_delay_xgboost_reference_profile.pkl', 'rb') as f:
+        return pickle.load(f)
+
 def get_user_inputs():
     print("\n===== Flight Delay Prediction Tool =====")
     print("Please enter the following flight details:\n")
@@ -389,9 +424,12 @@ def get_user_inputs():
         print("\nOperation cancelled by user.")
         sys.exit(0)
 
-def preprocess_inputs(user_inputs):
+def preprocess_inputs(user_inputs, float_dtype=np.float64):
     df = pd.DataFrame([user_inputs])
     
+    # Raw codes are encoded below; keep them for the unseen-category check
+    raw_categories = {col: df[col].astype(str).tolist() for col in MONITORED_CATEGORIES if col in df.columns}
+    
     if 'DEP_HOUR' not in df.columns:
         df['DEP_HOUR'] = df['DEP_TIME'] // 100
     
@@ -411,7 +449,7 @@ def preprocess_inputs(user_inputs):
         carriers = ['AA', 'DL', 'UA', 'WN', 'B6', 'AS', 'NK', 'F9', 'HA', 'G4', '9E', 'OH', 'YX', 'MQ', 'OO']
         for carrier in carriers:
             col_name = 'OP_UNIQUE_CARRIER_' + carrier
-            df[col_name] = 0
+            df[col_name] = np.int8(0)
         
         carrier = df['OP_UNIQUE_CARRIER'].iloc[0]
         if 'OP_UNIQUE_CARRIER_' + carrier in df.columns:
@@ -470,34 +508,50 @@ def preprocess_inputs(user_inputs):
     drop_cols = ['OP_CARRIER', 'ORIGIN_CONDITIONS', 'DEST_CONDITIONS', 'HOLIDAY_NAME']
     df = df.drop(columns=[col for col in drop_cols if col in df.columns])
     
+    df = enforce_schema(df, with_float_dtype(float_dtype))
+    df.attrs['categories'] = raw_categories
+    
     return df
 
-def predict_delay(df, model, scaler):
+def align_features(df, scaler):
+    scaler_columns = scaler.feature_names_in_ if hasattr(scaler, 'feature_names_in_') else None
+    
+    if scaler_columns is None:
+        return df.copy()
+    
+    df_aligned = pd.DataFrame(0, index=df.index, columns=scaler_columns, dtype=np.float32)
+    
+    for col in df.columns:
+        if col in scaler_columns:
+            df_aligned[col] = df[col]
+    
+    return df_aligned
+
+def scale_aligned(df_aligned, scaler, float_dtype=np.float64):
+    return pd.DataFrame(scaler.transform(df_aligned.astype(float_dtype)), columns=df_aligned.columns, dtype=np.float32)
+
+def scale_features(df, scaler, float_dtype=np.float64):
+    return scale_aligned(align_features(df, scaler), scaler, float_dtype)
+
+def prepare_features(df, scaler, float_dtype=np.float64):
+    df_aligned = align_features(df, scaler)
+    return df_aligned, scale_aligned(df_aligned, scaler, float_dtype)
+
+def predict_delay(df, model, scaler, monitor=None, prepared=None):
     try:
-        df_copy = df.copy()
-        
-        scaler_columns = scaler.feature_names_in_ if hasattr(scaler, 'feature_names_in_') else None
-        
-        if scaler_columns is not None:
-            empty_df = pd.DataFrame(0, index=df_copy.index, columns=scaler_columns)
-            
-            for col in df_copy.columns:
-                if col in scaler_columns:
-                    empty_df[col] = df_copy[col]
-                    
-            df_to_scale = empty_df
-        else:
-            df_to_scale = df_copy
-        
-        df_scaled = pd.DataFrame(scaler.transform(df_to_scale), columns=df_to_scale.columns)
+        df_aligned, df_scaled = prepared if prepared is not None else prepare_features(df, scaler, feature_dtype(model))
         
         dmatrix = xgb.DMatrix(df_scaled)
         
-        prediction_prob = model.predict(dmatrix)[0]
+        probabilities = model.predict(dmatrix)
+        prediction_prob = probabilities[0]
         
         optimal_threshold = 0.49
         prediction = 1 if prediction_prob >= optimal_threshold else 0
         
+        if monitor is not None:
+            update_monitor(monitor, df_aligned, probabilities, df.attrs.get('categories'))
+        
         return prediction, prediction_prob, optimal_threshold
         
     except Exception as e:
@@ -509,6 +563,75 @@ def predict_delay(df, model, scaler):
         
         return None, None, None
 
+def feature_group(feature):
+    if 'CARRIER' in feature:
+        return 'carrier'
+    if any(keyword in feature for keyword in WEATHER_KEYWORDS):
+        return 'weather'
+    if any(keyword in feature for keyword in TIME_KEYWORDS):
+        return 'time'
+    if any(keyword in feature for keyword in ROUTE_KEYWORDS):
+        return 'route'
+    raise ValueError(f"Feature {feature} is not assigned to an explanation group")
+
+def explain_delay(df, model, scaler, top_k=3, df_scaled=None):
+    if df_scaled is None:
+        df_scaled = scale_features(df, scaler, feature_dtype(model))
+    features = df_scaled.columns.tolist()
+    values = np.ascontiguousarray(df_scaled.to_numpy(dtype=np.float32))
+    # Group contributions are cached per model and scaled feature vector, so repeat flights skip the booster.
+    keys = [row.tobytes() for row in values]
+    cache = _explanation_caches.setdefault(model, OrderedDict())
+    
+    cached = {}
+    pending = {}
+    for i, key in enumerate(keys):
+        if key in cache:
+            cache.move_to_end(key)
+            cached[key] = cache[key]
+        else:
+            pending.setdefault(key, i)
+    
+    if pending:
+        rows = list(pending.values())
+        dmatrix = xgb.DMatrix(values[rows], feature_names=features)
+        contribs = model.predict(dmatrix, pred_contribs=True)[:, :-1]
+        
+        groups = [feature_group(feature) for feature in features]
+        grouped = np.zeros((len(rows), len(EXPLANATION_GROUPS)), dtype=np.float32)
+        drivers = []
+        for g, group in enumerate(EXPLANATION_GROUPS):
+            idx = [i for i, name in enumerate(groups) if name == group]
+            if not idx:
+                drivers.append([None] * len(rows))
+                continue
+            group_contribs = contribs[:, idx]
+            grouped[:, g] = group_contribs.sum(axis=1)
+            same_sign = (np.sign(group_contribs) == np.sign(grouped[:, g])[:, None]) | (grouped[:, g] == 0)[:, None]
+            top = np.where(same_sign, np.abs(group_contribs), -1).argmax(axis=1)
+            drivers.append([features[idx[j]] for j in top])
+        
+        for r, key in enumerate(pending):
+            cached[key] = (grouped[r].copy(), [driver[r] for driver in drivers])
+            cache[key] = cached[key]
+            if len(cache) > EXPLANATION_CACHE_SIZE:
+                cache.popitem(last=False)
+    
+    explanations = []
+    for key in keys:
+        grouped_row, drivers_row = cached[key]
+        order = np.argsort(-np.abs(grouped_row))[:top_k]
+        explanations.append([
+            {
+                'factor': EXPLANATION_GROUPS[g],
+                'contribution': float(grouped_row[g]),
+                'feature': drivers_row[g]
+            }
+            for g in order
+        ])
+    
+    return explanations
+
 def format_time_display(time_str):
     if not time_str or len(time_str) < 2:
         return "Unknown"
@@ -525,7 +648,64 @@ def format_time_display(time_str):
     except (ValueError, IndexError):
         return "Unknown"
 
-def display_prediction(inputs, prediction, probability, threshold):
+def get_rule_risk_factors(inputs):
+    risk_factors = []
+    
+    try:
+        hour = int(str(inputs['DEP_TIME'])[:2])
+        if 6 <= hour <= 9:
+            risk_factors.append("Morning rush hour flight (higher delay risk)")
+        elif 16 <= hour <= 19:
+            risk_factors.append("Evening rush hour flight (higher delay risk)")
+        elif hour >= 23 or hour <= 5:
+            risk_factors.append("Red-eye flight (often less congested)")
+        else:
+            risk_factors.append("Mid-day flight (moderate delay risk)")
+    except (KeyError, ValueError, TypeError, IndexError):
+        pass
+    
+    try:
+        max_severity = inputs.get('MAX_WEATHER_SEVERITY', 0)
+        if max_severity >= 7:
+            risk_factors.append(f"Severe weather (severity: {max_severity}/10)")
+        elif max_severity >= 4:
+            risk_factors.append(f"Moderate weather concerns (severity: {max_severity}/10)")
+    except (KeyError, ValueError, TypeError):
+        pass
+    
+    try:
+        month = datetime.strptime(inputs['FL_DATE'], '%Y-%m-%d').month
+        if month in [11, 12]:
+            risk_factors.append("Holiday season (higher delay risk)")
+        elif month in [6, 7, 8]:
+            risk_factors.append("Summer travel season (higher delay risk)")
+        elif month in [3, 4]:
+            risk_factors.append("Spring break period (moderate delay risk)")
+    except (KeyError, ValueError, TypeError):
+        pass
+    
+    if inputs.get('IS_HOLIDAY', 0) == 1 and inputs.get('HOLIDAY_TRAVEL_PERIOD', 0) == 1:
+        risk_factors.append("Peak holiday travel period (higher delay risk)")
+    
+    try:
+        day_of_week = inputs.get('DAY_OF_WEEK', 0)
+        if day_of_week in [5, 7]:
+            risk_factors.append("Weekend travel day (higher delay risk)")
+    except (KeyError, ValueError, TypeError):
+        pass
+    
+    try:
+        distance = float(inputs['DISTANCE'])
+        if distance < 300:
+            risk_factors.append("Short flight (may have higher variability)")
+        elif distance > 2000:
+            risk_factors.append("Long-haul flight (exposure to more airspace)")
+    except (KeyError, ValueError, TypeError):
+        pass
+    
+    return risk_factors
+
+def display_prediction(inputs, prediction, probability, threshold, explanation=None):
     print("\n" + "="*50)
     print(" FLIGHT DELAY PREDICTION RESULTS ")
     print("="*50)
@@ -604,59 +784,16 @@ def display_prediction(inputs, prediction, probability, threshold):
     print(" DELAY RISK FACTORS")
     print("-"*50)
     
-    risk_factors = []
-    
-    try:
-        hour = int(str(inputs['DEP_TIME'])[:2])
-        if 6 <= hour <= 9:
-            risk_factors.append("Morning rush hour flight (higher delay risk)")
-        elif 16 <= hour <= 19:
-            risk_factors.append("Evening rush hour flight (higher delay risk)")
-        elif hour >= 23 or hour <= 5:
-            risk_factors.append("Red-eye flight (often less congested)")
-        else:
-            risk_factors.append("Mid-day flight (moderate delay risk)")
-    except (KeyError, ValueError, TypeError, IndexError):
-        pass
-    
-    try:
-        max_severity = inputs.get('MAX_WEATHER_SEVERITY', 0)
-        if max_severity >= 7:
-            risk_factors.append(f"Severe weather (severity: {max_severity}/10)")
-        elif max_severity >= 4:
-            risk_factors.append(f"Moderate weather concerns (severity: {max_severity}/10)")
-    except (KeyError, ValueError, TypeError):
-        pass
-    
-    try:
-        month = datetime.strptime(inputs['FL_DATE'], '%Y-%m-%d').month
-        if month in [11, 12]:
-            risk_factors.append("Holiday season (higher delay risk)")
-        elif month in [6, 7, 8]:
-            risk_factors.append("Summer travel season (higher delay risk)")
-        elif month in [3, 4]:
-            risk_factors.append("Spring break period (moderate delay risk)")
-    except (KeyError, ValueError, TypeError):
-        pass
-    
-    if inputs.get('IS_HOLIDAY', 0) == 1 and inputs.get('HOLIDAY_TRAVEL_PERIOD', 0) == 1:
-        risk_factors.append("Peak holiday travel period (higher delay risk)")
-    
-    try:
-        day_of_week = inputs.get('DAY_OF_WEEK', 0)
-        if day_of_week in [5, 7]:
-            risk_factors.append("Weekend travel day (higher delay risk)")
-    except (KeyError, ValueError, TypeError):
-        pass
-    
-    try:
-        distance = float(inputs['DISTANCE'])
-        if distance < 300:
-            risk_factors.append("Short flight (may have higher variability)")
-        elif distance > 2000:
-            risk_factors.append("Long-haul flight (exposure to more airspace)")
-    except (KeyError, ValueError, TypeError):
-        pass
+    if explanation is not None:
+        risk_factors = []
+        for factor in explanation:
+            direction = "raises" if factor['contribution'] > 0 else "lowers"
+            risk_factors.append(
+                f"{EXPLANATION_LABELS[factor['factor']]} {direction} delay risk "
+                f"({factor['contribution']:+.3f} log-odds, mainly {factor['feature']})"
+            )
+    else:
+        risk_factors = get_rule_risk_factors(inputs)
     
     if risk_factors:
         for factor in risk_factors:
@@ -673,32 +810,73 @@ def display_prediction(inputs, prediction, probability, threshold):
     print("      and may not account for all current factors.")
     print("="*50)
 
+def display_drift_alerts(alerts):
+    if not alerts:
+        return
+    
+    print("\n"+"-"*50)
+    print(" DATA QUALITY WARNINGS")
+    print("-"*50)
+    for alert in alerts:
+        print(f"- {format_alert(alert)}")
+
+def run_prediction(model, scaler, explain=False, top_k=3, monitor=None):
+    user_inputs = get_user_inputs()
+    
+    float_dtype = feature_dtype(model)
+    df = preprocess_inputs(user_inputs, float_dtype)
+    
+    # Explanations reuse the scaled frame so they cost one extra booster call
+    prepared = prepare_features(df, scaler, float_dtype) if explain else None
+    
+    prediction, probability, threshold = predict_delay(df, model, scaler, monitor, prepared)
+    
+    if prediction is not None and probability is not None and threshold is not None:
+        explanation = explain_delay(df, model, scaler, top_k, prepared[1])[0] if explain else None
+        display_prediction(user_inputs, prediction, probability, threshold, explanation)
+        
+        if monitor is not None:
+            display_drift_alerts(pop_alerts(monitor))
+    else:
+        print("\nCould not make prediction due to errors. Please try again with different inputs.")
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a positive integer, got {value}")
+    return number
+
+def monitor_window(value):
+    number = int(value)
+    if number < MIN_CHECK_ROWS:
+        raise argparse.ArgumentTypeError(f"expected at least {MIN_CHECK_ROWS} predictions per window, got {value}")
+    return number
+
 def main():
+    parser = argparse.ArgumentParser(description="Flight Delay Prediction Tool")
+    parser.add_argument('--explain', action='store_true',
+                        help="List risk factors from the model's SHAP contributions instead of fixed rules")
+    parser.add_argument('--top-k', type=positive_int, default=3,
+                        help="Number of risk factors to show with --explain (default: 3)")
+    parser.add_argument('--monitor-every', type=monitor_window, default=DEFAULT_CHECK_EVERY,
+                        help=f"Compare each window of N predictions against the training profile (default: {DEFAULT_CHECK_EVERY})")
+    args = parser.parse_args()
+    
     try:
         model, scaler = load_model()
         
-        user_inputs = get_user_inputs()
-        
-        df = preprocess_inputs(user_inputs)
+        profile = load_reference_profile()
+        monitor = new_monitor(profile, args.monitor_every) if profile is not None else None
         
-        prediction, probability, threshold = predict_delay(df, model, scaler)
-        
-        if prediction is not None and probability is not None and threshold is not None:
-            display_prediction(user_inputs, prediction, probability, threshold)
-        else:
-            print("\nCould not make prediction due to errors. Please try again with different inputs.")
+        run_prediction(model, scaler, args.explain, args.top_k, monitor)
         
         while True:
             again = input("\nMake another prediction? (y/n): ").lower()
             if again in ['y', 'yes']:
-                user_inputs = get_user_inputs()
-                df = preprocess_inputs(user_inputs)
-                prediction, probability, threshold = predict_delay(df, model, scaler)
-                if prediction is not None and probability is not None and threshold is not None:
-                    display_prediction(user_inputs, prediction, probability, threshold)
-                else:
-                    print("\nCould not make prediction due to errors. Please try again with different inputs.")
+                run_prediction(model, scaler, args.explain, args.top_k, monitor)
             elif again in ['n', 'no']:
+                if monitor is not None:
+                    display_drift_alerts(check_drift(monitor))
                 print("\nThank you for using the Flight Delay Predictor!")
                 break
             else: